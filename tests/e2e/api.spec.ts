@@ -0,0 +1,12 @@
+import { expect, test } from "@playwright/test";
+
+import { uniqueDomain } from "./helpers/api";
+
+test("unique_domain_returns_distinct_domains_for_back_to_back_calls", async () => {
+  const domains = Array.from({ length: 50 }, () => uniqueDomain("burst"));
+
+  expect(new Set(domains).size).toBe(domains.length);
+  for (const domain of domains) {
+    expect(domain).toMatch(/^burst-\d+-\d+\.example\.invalid$/);
+  }
+});
@@ -6,17 +6,39 @@
  */
 
 import { APIRequestContext, APIResponse } from "@playwright/test";
-import { REQUEST_TIMEOUT } from "./config";
+import {
+  POLL_INITIAL_INTERVAL,
+  POLL_INTERVAL,
+  REQUEST_TIMEOUT,
+} from "./config";
 
 // ── Internal helpers ────────────────────────────────────────────────────
 
+// Built once per session token rather than on every helper call.
+const NO_AUTH_HEADERS: Record<string, string> = {};
+const sessionHeaders = new Map<string, Record<string, string>>();
+
 function authHeaders(session?: string): Record<string, string> {
-  if (!session) return {};
-  return { Cookie: `lala_session=${session}` };
+  if (!session) return NO_AUTH_HEADERS;
+  let headers = sessionHeaders.get(session);
+  if (!headers) {
+    headers = { Cookie: `lala_session=${session}` };
+    sessionHeaders.set(session, headers);
+  }
+  return headers;
 }
 
 // ── Domain management ───────────────────────────────────────────────────
 
+export type AllowedDomainList = {
+  domains: {
+    domain: string;
+    notes?: string | null;
+    added_by?: string | null;
+  }[];
+  count: number;
+};
+
 export async function addAllowedDomain(
   request: APIRequestContext,
   domain: string,
@@ -29,6 +51,30 @@ export async function addAllowedDomain(
   });
 }
 
+export type AddDomainResult = {
+  success: boolean;
+  message: string;
+  domain: string;
+};
+
+/**
+ * Add `domain` and return the parsed response body; throws on a non-2xx
+ * response, for fixtures and setup that cannot continue without the domain.
+ */
+export async function seedAllowedDomain(
+  request: APIRequestContext,
+  domain: string,
+  opts: { session?: string; notes?: string } = {},
+): Promise<AddDomainResult> {
+  const resp = await addAllowedDomain(request, domain, opts);
+  if (!resp.ok()) {
+    throw new Error(
+      `Seeding allowed domain ${domain} failed: HTTP ${resp.status()} — ${await resp.text()}`,
+    );
+  }
+  return resp.json();
+}
+
 export async function deleteAllowedDomain(
   request: APIRequestContext,
   domain: string,
@@ -50,6 +96,20 @@ export async function listAllowedDomains(
   });
 }
 
+/** Parsed allowed-domain list for `session`; throws on a non-2xx response. */
+export async function getAllowedDomains(
+  request: APIRequestContext,
+  session?: string,
+): Promise<AllowedDomainList> {
+  const resp = await listAllowedDomains(request, session);
+  if (!resp.ok()) {
+    throw new Error(
+      `GET /admin/allowed-domains failed with HTTP ${resp.status()}: ${await resp.text()}`,
+    );
+  }
+  return (await resp.json()) as AllowedDomainList;
+}
+
 // ── Queue ───────────────────────────────────────────────────────────────
 
 export async function addToQueue(
@@ -64,6 +124,23 @@ export async function addToQueue(
   });
 }
 
+/**
+ * Allow `domain` and queue `url` for crawling. The two calls stay sequential
+ * because /queue/add rejects URLs whose domain is not yet allowed.
+ */
+export async function seedCrawl(
+  request: APIRequestContext,
+  domain: string,
+  url: string,
+  opts: { session?: string; priority?: number } = {},
+): Promise<{ added: APIResponse; queued: APIResponse }> {
+  const added = await addAllowedDomain(request, domain, {
+    session: opts.session,
+  });
+  const queued = await addToQueue(request, url, opts);
+  return { added, queued };
+}
+
 // ── Search ──────────────────────────────────────────────────────────────
 
 export async function search(
@@ -78,12 +155,132 @@ export async function search(
   });
 }
 
+export type SearchResults = {
+  results?: { document: { url?: string } }[];
+};
+
+export function resultUrls(results: SearchResults): (string | undefined)[] {
+  return (results.results ?? []).map((r) => r.document?.url);
+}
+
+type SearchProbe = { results: SearchResults } | { error: string };
+
+/**
+ * Search as `session` and return the parsed payload, or a description of why
+ * there is none: a transport error, a non-200 response (e.g. 503 while the
+ * tenant index is created) or an unparseable body.
+ */
+async function probeSearch(
+  request: APIRequestContext,
+  query: string,
+  session?: string,
+): Promise<SearchProbe> {
+  try {
+    const resp = await search(request, query, { session });
+    if (resp.status() !== 200) {
+      return { error: `HTTP ${resp.status()}: ${await resp.text()}` };
+    }
+    return { results: (await resp.json()) as SearchResults };
+  } catch (e) {
+    return { error: `search failed: ${e}` };
+  }
+}
+
+export type IndexedUrl = {
+  // Payload of the search that contained the URL.
+  results: SearchResults;
+  // Same query as `crossCheckSession`, issued alongside that search; `null`
+  // if the cross-check search was unavailable.
+  crossCheck: SearchResults | null;
+};
+
+/**
+ * Poll search until `url` appears in the results for `query`, backing off
+ * between attempts. Failed searches count as misses; if the URL did not show
+ * up within `opts.timeout` ms, throws with the outcome of the last probe
+ * (error, status or result count) so a timeout says what the agent returned.
+ *
+ * With `crossCheckSession`, every probe also runs the same query as that
+ * session in parallel, so isolation can be asserted on the very iteration
+ * that found the URL without a trailing round trip.
+ */
+export async function waitForUrlIndexed(
+  request: APIRequestContext,
+  url: string,
+  query: string,
+  opts: {
+    timeout: number;
+    session?: string;
+    crossCheckSession?: string;
+    initialInterval?: number;
+    maxInterval?: number;
+    backoffFactor?: number;
+  },
+): Promise<IndexedUrl> {
+  const deadline = performance.now() + opts.timeout;
+  const maxInterval = opts.maxInterval ?? POLL_INTERVAL;
+  let delay = opts.initialInterval ?? POLL_INITIAL_INTERVAL;
+  let attempts = 0;
+  let lastOutcome = "no search attempted";
+
+  while (performance.now() < deadline) {
+    // Start the pause together with the probe so the poll cadence is the
+    // backoff delay itself, not the delay plus the search round trip.
+    const pause = sleep(jitter(delay));
+    delay = backoff(delay, maxInterval, opts.backoffFactor);
+
+    const [probe, crossCheck] = await Promise.all([
+      probeSearch(request, query, opts.session),
+      opts.crossCheckSession === undefined
+        ? null
+        : probeSearch(request, query, opts.crossCheckSession),
+    ]);
+    attempts++;
+    if ("error" in probe) {
+      lastOutcome = probe.error;
+    } else if (resultUrls(probe.results).includes(url)) {
+      return {
+        results: probe.results,
+        crossCheck:
+          crossCheck && "results" in crossCheck ? crossCheck.results : null,
+      };
+    } else {
+      const count = probe.results.results?.length ?? 0;
+      lastOutcome = `${count} results without the URL`;
+    }
+    await pause;
+  }
+
+  throw new Error(
+    `${url} not found in search for "${query}" after ${opts.timeout / 1000}s ` +
+      `(${attempts} attempts); last probe: ${lastOutcome}`,
+  );
+}
+
 // ── Utilities ───────────────────────────────────────────────────────────
 
+// Process id + per-process counter: unique across parallel workers and
+// across calls within the same millisecond, unlike a Date.now() stamp.
+let domainCounter = 0;
+
 export function uniqueDomain(prefix: string = "e2e"): string {
-  return `${prefix}-${Date.now()}.example.invalid`;
+  return `${prefix}-${process.pid}-${domainCounter++}.example.invalid`;
 }
 
 export function sleep(ms: number): Promise<void> {
   return new Promise((resolve) => setTimeout(resolve, ms));
 }
+
+/** Grow a poll delay by `factor` (doubling by default), capped at `max` (ms). */
+export function backoff(
+  delay: number,
+  max: number,
+  factor: number = 2,
+): number {
+  return Math.min(delay * factor, max);
+}
+
+/** Add up to `spread` ms of random jitter so parallel pollers drift apart. */
+export function jitter(delay: number, spread: number = 100): number {
+  return delay + Math.random() * spread;
+}
@@ -4,9 +4,10 @@
  * Timeouts are in milliseconds (Playwright convention).
  */
 
-// Agent URL
+// Agent URL. Defaults use 127.0.0.1 rather than localhost so new connections
+// skip name resolution (and Node's IPv6-first ::1 attempt).
 export const AGENT_URL =
-  process.env.LALA_AGENT_URL || "http://localhost:3000";
+  process.env.LALA_AGENT_URL || "http://127.0.0.1:3000";
 
 // Per-request timeout (ms)
 export const REQUEST_TIMEOUT = 10_000;
@@ -14,18 +15,29 @@ export const REQUEST_TIMEOUT = 10_000;
 // How long to wait for a magic-link email to arrive in Mailpit (ms)
 export const EMAIL_WAIT_TIMEOUT = 60_000;
 
+// First and maximum delay between Mailpit inbox polls (ms)
+export const EMAIL_POLL_INITIAL_INTERVAL = 200;
+export const EMAIL_POLL_MAX_INTERVAL = 2_000;
+
 // How long the single-tenant pipeline test polls for crawl+index (ms)
 export const TEST_TIMEOUT = 60_000;
 
+// Single-tenant pipeline search polling: first delay (ms), growth factor, and
+// cap (ms). Starts tight because a warm agent often indexes within a second.
+export const PIPELINE_POLL_INITIAL_INTERVAL = 100;
+export const PIPELINE_POLL_BACKOFF_FACTOR = 1.5;
+export const PIPELINE_POLL_MAX_INTERVAL = 2_000;
+
 // How long the multi-tenant pipeline test polls for crawl+index (ms)
 export const MULTI_TENANT_TEST_TIMEOUT = 90_000;
 
-// Interval between search polls (ms)
+// First and maximum interval between search polls (ms)
+export const POLL_INITIAL_INTERVAL = 500;
 export const POLL_INTERVAL = 3_000;
 
 // Mailpit API base URL
 export const MAILPIT_API_BASE_URL =
-  process.env.MAILPIT_API_BASE_URL || "http://localhost:8025/api/v1";
+  process.env.MAILPIT_API_BASE_URL || "http://127.0.0.1:8025/api/v1";
 
 function sanitizeRunId(value: string): string {
   return value.toLowerCase().replace(/[^a-z0-9-]/g, "").slice(0, 24) || "local";
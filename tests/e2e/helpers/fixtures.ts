@@ -0,0 +1,96 @@
+/**
+ * Playwright fixtures shared by the E2E specs.
+ *
+ * `agent` is one keep-alive request context per worker, used instead of the
+ * built-in per-test `request` fixture so tests reuse the same connections.
+ *
+ * `createdDomain` adds a unique allowed domain before the test and deletes it
+ * afterwards (deletion is idempotent, so tests may remove it themselves).
+ *
+ * `approvedDomain` is a unique allowed domain added once per worker, on first
+ * use, and deleted when the worker shuts down. It is for tests that only need
+ * some allowed domain to exist and do not modify it.
+ *
+ * `baselineSearch` is the status and body of one search for
+ * BASELINE_SEARCH_QUERY, issued once per worker on first use, so search tests
+ * can add assertions on it without adding requests.
+ */
+
+import { test as base, APIRequestContext } from "@playwright/test";
+import {
+  AddDomainResult,
+  deleteAllowedDomain,
+  search,
+  seedAllowedDomain,
+  uniqueDomain,
+} from "./api";
+import { AGENT_URL } from "./config";
+
+export const CREATED_DOMAIN_NOTES = "E2E fixture domain";
+export const BASELINE_SEARCH_QUERY = "test";
+
+export type CreatedDomain = {
+  domain: string;
+  // Body of the POST /admin/allowed-domains response that created it.
+  added: AddDomainResult;
+};
+
+export type BaselineSearch = {
+  status: number;
+  // Parsed body; empty for non-200 responses, whose bodies are plain text.
+  data: Record<string, unknown>;
+};
+
+export const test = base.extend<
+  { createdDomain: CreatedDomain },
+  {
+    agent: APIRequestContext;
+    approvedDomain: string;
+    baselineSearch: BaselineSearch;
+  }
+>({
+  createdDomain: async ({ agent }, use) => {
+    const domain = uniqueDomain("fixture");
+    const added = await seedAllowedDomain(agent, domain, {
+      notes: CREATED_DOMAIN_NOTES,
+    });
+
+    await use({ domain, added });
+
+    await deleteAllowedDomain(agent, domain);
+  },
+  agent: [
+    async ({ playwright }, use) => {
+      const agent = await playwright.request.newContext({
+        baseURL: AGENT_URL,
+        extraHTTPHeaders: { "Content-Type": "application/json" },
+      });
+      await use(agent);
+      await agent.dispose();
+    },
+    { scope: "worker" },
+  ],
+  approvedDomain: [
+    async ({ agent }, use) => {
+      const domain = uniqueDomain("approved");
+      await seedAllowedDomain(agent, domain);
+
+      await use(domain);
+
+      await deleteAllowedDomain(agent, domain);
+    },
+    { scope: "worker" },
+  ],
+  baselineSearch: [
+    async ({ agent }, use) => {
+      const response = await search(agent, BASELINE_SEARCH_QUERY);
+      await use({
+        status: response.status(),
+        data: response.ok() ? await response.json() : {},
+      });
+    },
+    { scope: "worker" },
+  ],
+});
+
+export { expect } from "@playwright/test";
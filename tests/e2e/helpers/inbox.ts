@@ -4,13 +4,21 @@
  * Uses the Mailpit REST API exposed by the test-only Docker service.
  */
 
-import { request as playwrightRequest } from "@playwright/test";
 import {
+  APIRequestContext,
+  request as playwrightRequest,
+} from "@playwright/test";
+import { backoff, jitter, sleep } from "./api";
+import {
+  EMAIL_POLL_INITIAL_INTERVAL,
+  EMAIL_POLL_MAX_INTERVAL,
   EMAIL_WAIT_TIMEOUT,
   MAILPIT_API_BASE_URL,
   REQUEST_TIMEOUT,
 } from "./config";
 
+const MAGIC_LINK_RE = /\/auth\/verify\/([a-f0-9]{64})/;
+
 type MailpitAddress = {
   Address?: string;
 };
@@ -18,6 +26,7 @@ type MailpitAddress = {
 type MailpitMessageSummary = {
   ID: string;
   To?: MailpitAddress[];
+  Snippet?: string;
 };
 
 type MailpitMessageListResponse = {
@@ -31,8 +40,20 @@ type MailpitMessage = {
   To?: MailpitAddress[];
 };
 
-function sleep(ms: number): Promise<void> {
-  return new Promise((resolve) => setTimeout(resolve, ms));
+// One keep-alive context for every Mailpit call, created lazily and released
+// via disposeInbox() so polling does not reconnect on each request.
+let inboxContext: Promise<APIRequestContext> | null = null;
+
+// Deletes of already-read messages run in the background; disposeInbox()
+// waits for them before releasing the context.
+const pendingDeletes = new Set<Promise<void>>();
+
+function mailpit(): Promise<APIRequestContext> {
+  // Trailing slash so relative paths resolve under the API prefix.
+  inboxContext ??= playwrightRequest.newContext({
+    baseURL: MAILPIT_API_BASE_URL.replace(/\/?$/, "/"),
+  });
+  return inboxContext;
 }
 
 function normalizeEmail(email: string): string {
@@ -50,65 +71,85 @@ export function extractMagicLinkToken(message: {
   Text?: string;
   HTML?: string;
 }): string | null {
-  const body = `${message.Text ?? ""}\n${message.HTML ?? ""}`;
-  const match = body.match(/\/auth\/verify\/([a-f0-9]{64})/);
-  return match ? match[1] : null;
+  // Scan the short text part first; the HTML part is only needed when the
+  // text part is missing or lacks the link.
+  for (const body of [message.Text, message.HTML]) {
+    const match = body ? MAGIC_LINK_RE.exec(body) : null;
+    if (match) return match[1];
+  }
+  return null;
 }
 
-async function listMessages(): Promise<MailpitMessageSummary[]> {
-  const ctx = await playwrightRequest.newContext();
-  try {
-    const resp = await ctx.get(`${MAILPIT_API_BASE_URL}/messages`, {
-      timeout: REQUEST_TIMEOUT,
-    });
-    if (resp.status() !== 200) {
-      throw new Error(
-        `Mailpit list messages failed with HTTP ${resp.status()}: ${await resp.text()}`,
-      );
-    }
-
-    const payload = (await resp.json()) as MailpitMessageListResponse;
-    return payload.messages ?? [];
-  } finally {
-    await ctx.dispose();
+/**
+ * List only the messages addressed to `toEmail`, filtered by Mailpit's search
+ * endpoint so unrelated inbox traffic is never transferred or parsed.
+ */
+async function searchMessagesTo(
+  toEmail: string,
+): Promise<MailpitMessageSummary[]> {
+  const ctx = await mailpit();
+  const resp = await ctx.get("search", {
+    params: { query: `to:"${normalizeEmail(toEmail)}"` },
+    timeout: REQUEST_TIMEOUT,
+  });
+  if (resp.status() !== 200) {
+    throw new Error(
+      `Mailpit search messages failed with HTTP ${resp.status()}: ${await resp.text()}`,
+    );
   }
+
+  const payload = (await resp.json()) as MailpitMessageListResponse;
+  return payload.messages ?? [];
 }
 
 async function getMessage(id: string): Promise<MailpitMessage> {
-  const ctx = await playwrightRequest.newContext();
-  try {
-    const resp = await ctx.get(`${MAILPIT_API_BASE_URL}/message/${id}`, {
-      timeout: REQUEST_TIMEOUT,
-    });
-    if (resp.status() !== 200) {
-      throw new Error(
-        `Mailpit get message failed for ${id} with HTTP ${resp.status()}: ${await resp.text()}`,
-      );
-    }
-
-    return (await resp.json()) as MailpitMessage;
-  } finally {
-    await ctx.dispose();
+  const ctx = await mailpit();
+  const resp = await ctx.get(`message/${id}`, {
+    timeout: REQUEST_TIMEOUT,
+  });
+  if (resp.status() !== 200) {
+    throw new Error(
+      `Mailpit get message failed for ${id} with HTTP ${resp.status()}: ${await resp.text()}`,
+    );
   }
+
+  return (await resp.json()) as MailpitMessage;
 }
 
 async function deleteMessages(ids?: string[]): Promise<void> {
-  const ctx = await playwrightRequest.newContext();
-  try {
-    const resp = await ctx.delete(`${MAILPIT_API_BASE_URL}/messages`, {
-      data: ids && ids.length > 0 ? { IDs: ids } : {},
-      timeout: REQUEST_TIMEOUT,
-    });
-    if (resp.status() !== 200) {
-      throw new Error(
-        `Mailpit delete messages failed with HTTP ${resp.status()}: ${await resp.text()}`,
-      );
-    }
-  } finally {
-    await ctx.dispose();
+  const ctx = await mailpit();
+  const resp = await ctx.delete("messages", {
+    data: ids && ids.length > 0 ? { IDs: ids } : {},
+    timeout: REQUEST_TIMEOUT,
+  });
+  if (resp.status() !== 200) {
+    throw new Error(
+      `Mailpit delete messages failed with HTTP ${resp.status()}: ${await resp.text()}`,
+    );
   }
 }
 
+function deleteMessageInBackground(id: string): void {
+  const pending = deleteMessages([id])
+    .catch((e) => console.log(`Mailpit cleanup of message ${id} failed: ${e}`))
+    .finally(() => {
+      pendingDeletes.delete(pending);
+    });
+  pendingDeletes.add(pending);
+}
+
+/**
+ * Flush pending message deletes and release the shared Mailpit request
+ * context. Call once from `afterAll`.
+ */
+export async function disposeInbox(): Promise<void> {
+  await Promise.all(pendingDeletes);
+  if (!inboxContext) return;
+  const ctx = await inboxContext;
+  inboxContext = null;
+  await ctx.dispose();
+}
+
 /**
  * Delete all messages from the local Mailpit inbox.
  */
@@ -119,32 +160,46 @@ export async function clearInbox(): Promise<void> {
 /**
  * Poll the local Mailpit inbox until an email addressed to `toEmail` arrives.
  * Extracts and returns the magic-link token (64-character hex string).
- * Deletes the matched message after reading to keep the inbox clean.
+ * Deletes the matched message in the background to keep the inbox clean
+ * without delaying the caller.
  */
 export async function getMagicLinkToken(
   toEmail: string,
   timeout: number = EMAIL_WAIT_TIMEOUT,
 ): Promise<string> {
-  const deadline = Date.now() + timeout;
+  const deadline = performance.now() + timeout;
+  let delay = EMAIL_POLL_INITIAL_INTERVAL;
+  // Messages already inspected without a token are skipped on later polls.
+  const seenIds = new Set<string>();
 
-  while (Date.now() < deadline) {
-    const messages = await listMessages();
+  while (performance.now() < deadline) {
+    const messages = await searchMessagesTo(toEmail);
     for (const message of messages) {
+      if (seenIds.has(message.ID)) {
+        continue;
+      }
+      seenIds.add(message.ID);
+
+      // Mailpit search matches substrings, so keep the exact-recipient check.
       if (!messageTargetsEmail(message, toEmail)) {
         continue;
       }
 
-      const fullMessage = await getMessage(message.ID);
-      const token = extractMagicLinkToken(fullMessage);
+      // The verify link sits near the top of the template, so the listing's
+      // text snippet usually carries the whole token and saves a fetch.
+      const token =
+        extractMagicLinkToken({ Text: message.Snippet }) ??
+        extractMagicLinkToken(await getMessage(message.ID));
       if (!token) {
         continue;
       }
 
-      await deleteMessages([message.ID]);
+      deleteMessageInBackground(message.ID);
       return token;
     }
 
-    await sleep(2000);
+    await sleep(jitter(delay));
+    delay = backoff(delay, EMAIL_POLL_MAX_INTERVAL);
   }
 
   throw new Error(
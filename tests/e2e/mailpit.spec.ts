@@ -10,3 +10,20 @@ test("extract_magic_link_token_returns_token_from_message_text", async () => {
 
   expect(extractMagicLinkToken(message)).toBe(token);
 });
+
+test("extract_magic_link_token_returns_null_for_truncated_snippet", async () => {
+  const token = "0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef";
+  const snippet = `Click here: http://localhost:3000/auth/verify/${token.slice(0, 40)}`;
+
+  expect(extractMagicLinkToken({ Text: snippet })).toBeNull();
+});
+
+test("extract_magic_link_token_falls_back_to_message_html", async () => {
+  const token = "0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef";
+  const message = {
+    Text: "Sign in to LalaSearch",
+    HTML: `<a href="http://localhost:3000/auth/verify/${token}">Sign in</a>`,
+  };
+
+  expect(extractMagicLinkToken(message)).toBe(token);
+});
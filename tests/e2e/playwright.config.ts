@@ -1,14 +1,17 @@
 import { defineConfig } from "@playwright/test";
+import { AGENT_URL } from "./helpers/config";
 
 export default defineConfig({
   testDir: ".",
   testMatch: "*.spec.ts",
   timeout: 120_000,
   retries: 0,
-  workers: 1,
-  reporter: [["list"]],
+  // Tests are independent (unique domains per worker/call); groups that share
+  // global state opt out with `test.describe.configure({ mode: "default" })`.
+  fullyParallel: true,
+  reporter: [["list", { printSteps: true }]],
   use: {
-    baseURL: process.env.LALA_AGENT_URL || "http://localhost:3000",
+    baseURL: AGENT_URL,
     extraHTTPHeaders: {
       "Content-Type": "application/json",
     },
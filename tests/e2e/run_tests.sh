@@ -13,7 +13,7 @@ NC='\033[0m' # No Color
 # Configuration
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PROJECT_ROOT="$(cd "$SCRIPT_DIR/../.." && pwd)"
-AGENT_URL="http://localhost:3000"
+AGENT_URL="http://127.0.0.1:3000"
 MAX_WAIT=120  # seconds to wait for services
 E2E_RUN_ID="${E2E_RUN_ID:-$(date +%s)}"
 USER1_EMAIL="user1-${E2E_RUN_ID}@test.e2e"
@@ -110,7 +110,7 @@ wait_for_postgres() {
 }
 
 wait_for_mailpit() {
-    wait_for_service "Mailpit" "http://localhost:8025/api/v1/info"
+    wait_for_service "Mailpit" "http://127.0.0.1:8025/api/v1/info"
 }
 
 cleanup_current_run_test_data() {
@@ -322,7 +322,7 @@ if ! docker compose ps --status running | grep -q "lalasearch-postgres"; then
     echo -e "${YELLOW}Starting base services (PostgreSQL, Meilisearch, SeaweedFS)...${NC}"
     docker compose up -d postgres meilisearch seaweedfs seaweedfs-init --build
     wait_for_postgres
-    wait_for_service "Meilisearch" "http://localhost:7700/health" || exit 1
+    wait_for_service "Meilisearch" "http://127.0.0.1:7700/health" || exit 1
 else
     echo -e "${GREEN}✓ Base services are already running${NC}"
 fi
@@ -449,7 +449,7 @@ echo "======================================"
 echo ""
 
 cd "$SCRIPT_DIR"
-MAILPIT_API_BASE_URL="http://localhost:8025/api/v1" \
+MAILPIT_API_BASE_URL="http://127.0.0.1:8025/api/v1" \
     npx playwright test multi-tenant.spec.ts
 MULTI_TENANT_RESULT=$?
 
@@ -13,25 +13,41 @@
  *   - TestFullPipeline     — End-to-end: queue → crawl → index → search
  */
 
-import { test, expect } from "@playwright/test";
-import { REQUEST_TIMEOUT, TEST_TIMEOUT } from "./helpers/config";
+import { test, expect, CREATED_DOMAIN_NOTES } from "./helpers/fixtures";
+import {
+  PIPELINE_POLL_BACKOFF_FACTOR,
+  PIPELINE_POLL_INITIAL_INTERVAL,
+  PIPELINE_POLL_MAX_INTERVAL,
+  REQUEST_TIMEOUT,
+  TEST_TIMEOUT,
+} from "./helpers/config";
 import {
-  addAllowedDomain,
   deleteAllowedDomain,
+  getAllowedDomains,
   listAllowedDomains,
   addToQueue,
-  search,
   uniqueDomain,
-  sleep,
+  seedCrawl,
+  waitForUrlIndexed,
+  resultUrls,
 } from "./helpers/api";
 
+// Add a case to PIPELINE_CASES to run the pipeline test on it.
+const PIPELINE_CASES = [
+  {
+    url: "https://en.wikipedia.org/wiki/Linux",
+    domain: "en.wikipedia.org",
+    searchTerm: "Linux",
+  },
+];
+
 // ---------------------------------------------------------------------------
 // GET /version
 // ---------------------------------------------------------------------------
 
 test.describe("TestVersion", () => {
-  test("returns 200 with version fields", async ({ request }) => {
-    const response = await request.get("/version", {
+  test("returns 200 with version fields", async ({ agent }) => {
+    const response = await agent.get("/version", {
       timeout: REQUEST_TIMEOUT,
     });
 
@@ -41,32 +57,18 @@ test.describe("TestVersion", () => {
     expect(data).toHaveProperty("agent");
     expect(data).toHaveProperty("deployment_mode");
     expect(data.agent).toBe("lala-agent");
-  });
 
-  test("version follows semver", async ({ request }) => {
-    const response = await request.get("/version", {
-      timeout: REQUEST_TIMEOUT,
-    });
-
-    const data = await response.json();
     const parts = data.version.split(".");
     expect(parts).toHaveLength(3);
     for (const p of parts) {
       expect(Number.isInteger(Number(p))).toBeTruthy();
     }
-  });
 
-  test("deployment mode is valid", async ({ request }) => {
-    const response = await request.get("/version", {
-      timeout: REQUEST_TIMEOUT,
-    });
-
-    const data = await response.json();
     expect(["single_tenant", "multi_tenant"]).toContain(data.deployment_mode);
   });
 
-  test("unknown route returns 404", async ({ request }) => {
-    const response = await request.get("/does-not-exist", {
+  test("unknown route returns 404", async ({ agent }) => {
+    const response = await agent.get("/does-not-exist", {
       timeout: REQUEST_TIMEOUT,
     });
 
@@ -79,23 +81,16 @@ test.describe("TestVersion", () => {
 // ---------------------------------------------------------------------------
 
 test.describe("TestAdminDomains", () => {
-  test("add domain success", async ({ request }) => {
-    const domain = uniqueDomain("add");
-
-    const resp = await addAllowedDomain(request, domain, { notes: "add test" });
-    expect(resp.ok()).toBeTruthy();
-    const result = await resp.json();
-
-    expect(result.success).toBe(true);
-    expect(result.domain).toBe(domain);
-    expect(result.message).toContain("Domain added");
+  test("add domain success", async ({ createdDomain }) => {
+    const { domain, added } = createdDomain;
 
-    // Cleanup
-    await deleteAllowedDomain(request, domain);
+    expect(added.success).toBe(true);
+    expect(added.domain).toBe(domain);
+    expect(added.message).toContain("Domain added");
   });
 
-  test("list domains returns array", async ({ request }) => {
-    const resp = await listAllowedDomains(request);
+  test("list domains returns array", async ({ agent }) => {
+    const resp = await listAllowedDomains(agent);
     const result = await resp.json();
 
     expect(result).toHaveProperty("domains");
@@ -103,49 +98,37 @@ test.describe("TestAdminDomains", () => {
     expect(result.count).toBe(result.domains.length);
   });
 
-  test("add then list shows domain", async ({ request }) => {
-    const domain = uniqueDomain("list");
-    await addAllowedDomain(request, domain, { notes: "list test" });
-
-    const resp = await listAllowedDomains(request);
-    const result = await resp.json();
-    const found = result.domains.find(
-      (d: { domain: string }) => d.domain === domain,
-    );
+  test("add then list shows domain", async ({ agent, createdDomain }) => {
+    const result = await getAllowedDomains(agent);
+    const found = result.domains.find((d) => d.domain === createdDomain.domain);
 
     expect(found).toBeTruthy();
-    expect(found.notes).toBe("list test");
-    expect(found.added_by).not.toBeNull();
-
-    // Cleanup
-    await deleteAllowedDomain(request, domain);
+    expect(found?.notes).toBe(CREATED_DOMAIN_NOTES);
+    expect(found?.added_by).not.toBeNull();
   });
 
-  test("delete domain removes it from list", async ({ request }) => {
-    const domain = uniqueDomain("del");
-    await addAllowedDomain(request, domain);
+  test("delete domain removes it from list", async ({
+    agent,
+    createdDomain,
+  }) => {
+    await deleteAllowedDomain(agent, createdDomain.domain);
+    const result = await getAllowedDomains(agent);
+    const domainNames = result.domains.map((d) => d.domain);
 
-    await deleteAllowedDomain(request, domain);
-    const resp = await listAllowedDomains(request);
-    const result = await resp.json();
-    const domainNames = result.domains.map(
-      (d: { domain: string }) => d.domain,
-    );
-
-    expect(domainNames).not.toContain(domain);
+    expect(domainNames).not.toContain(createdDomain.domain);
   });
 
-  test("delete nonexistent domain is idempotent", async ({ request }) => {
+  test("delete nonexistent domain is idempotent", async ({ agent }) => {
     const domain = uniqueDomain("ghost");
 
-    const resp = await deleteAllowedDomain(request, domain);
+    const resp = await deleteAllowedDomain(agent, domain);
     const result = await resp.json();
 
     expect(result.success).toBe(true);
   });
 
-  test("add empty domain returns 400", async ({ request }) => {
-    const response = await request.post("/admin/allowed-domains", {
+  test("add empty domain returns 400", async ({ agent }) => {
+    const response = await agent.post("/admin/allowed-domains", {
       data: { domain: "" },
       timeout: REQUEST_TIMEOUT,
     });
@@ -161,89 +144,35 @@ test.describe("TestAdminDomains", () => {
 // ---------------------------------------------------------------------------
 
 test.describe("TestQueueEndpoint", () => {
-  test("add approved domain URL succeeds", async ({ request }) => {
-    const domain = uniqueDomain("queue");
-    const testUrl = `https://${domain}/page`;
-    await addAllowedDomain(request, domain);
+  test("add approved domain URL succeeds", async ({
+    agent,
+    approvedDomain,
+  }) => {
+    const testUrl = `https://${approvedDomain}/page`;
 
-    const response = await addToQueue(request, testUrl);
+    const response = await addToQueue(agent, testUrl);
 
     expect(response.status()).toBe(200);
     const data = await response.json();
     expect(data.success).toBe(true);
     expect(data.url).toBe(testUrl);
-    expect(data.domain).toBe(domain);
-
-    // Cleanup
-    await deleteAllowedDomain(request, domain);
+    expect(data.domain).toBe(approvedDomain);
   });
 
-  test("invalid URL returns 400", async ({ request }) => {
-    const response = await addToQueue(request, "not-a-valid-url");
+  test("invalid URL returns 400", async ({ agent }) => {
+    const response = await addToQueue(agent, "not-a-valid-url");
 
     expect(response.status()).toBe(400);
   });
 
-  test("unapproved domain returns 403", async ({ request }) => {
+  test("unapproved domain returns 403", async ({ agent }) => {
     const unapproved = uniqueDomain("forbidden");
-    const response = await addToQueue(request, `https://${unapproved}/page`);
+    const response = await addToQueue(agent, `https://${unapproved}/page`);
 
     expect(response.status()).toBe(403);
     const text = await response.text();
     expect(text).toContain("not in the allowed domains list");
-  });
-});
-
-// ---------------------------------------------------------------------------
-// GET / PUT /admin/settings/crawling-enabled
-// ---------------------------------------------------------------------------
-
-test.describe("TestCrawlingSettings", () => {
-  test("get returns boolean", async ({ request }) => {
-    const response = await request.get("/admin/settings/crawling-enabled", {
-      timeout: REQUEST_TIMEOUT,
-    });
-
-    expect(response.status()).toBe(200);
-    const data = await response.json();
-    expect(data).toHaveProperty("enabled");
-    expect(typeof data.enabled).toBe("boolean");
-  });
-
-  test("disable then enable persists", async ({ request }) => {
-    const settingsUrl = "/admin/settings/crawling-enabled";
-    const originalResp = await request.get(settingsUrl, {
-      timeout: REQUEST_TIMEOUT,
-    });
-    const original = (await originalResp.json()).enabled;
-
-    // Disable
-    let r = await request.put(settingsUrl, {
-      data: { enabled: false },
-      timeout: REQUEST_TIMEOUT,
-    });
-    expect(r.status()).toBe(200);
-    expect((await r.json()).enabled).toBe(false);
-    let check = await request.get(settingsUrl, { timeout: REQUEST_TIMEOUT });
-    expect((await check.json()).enabled).toBe(false);
-
-    // Enable
-    r = await request.put(settingsUrl, {
-      data: { enabled: true },
-      timeout: REQUEST_TIMEOUT,
-    });
-    expect(r.status()).toBe(200);
-    expect((await r.json()).enabled).toBe(true);
-    check = await request.get(settingsUrl, { timeout: REQUEST_TIMEOUT });
-    expect((await check.json()).enabled).toBe(true);
-
-    // Restore original value
-    if (!original) {
-      await request.put(settingsUrl, {
-        data: { enabled: false },
-        timeout: REQUEST_TIMEOUT,
-      });
-    }
+    expect(text).toContain(unapproved);
   });
 });
 
@@ -252,101 +181,138 @@ test.describe("TestCrawlingSettings", () => {
 // ---------------------------------------------------------------------------
 
 test.describe("TestSearchEndpoint", () => {
-  test("search returns 200", async ({ request }) => {
-    const response = await search(request, "test");
+  // Tests in this group assert on the worker's baselineSearch fixture rather
+  // than issuing their own request for the same query.
+  test("search returns 200", async ({ baselineSearch }) => {
+    const { status, data } = baselineSearch;
 
-    expect(response.status()).toBe(200);
-    const data = await response.json();
+    expect(status).toBe(200);
     expect(data).toHaveProperty("results");
     expect(Array.isArray(data.results)).toBeTruthy();
   });
 });
 
 // ---------------------------------------------------------------------------
-// Full pipeline: Queue URL → Crawl → Index → Search
+// Crawler state: crawling-enabled setting + full pipeline
 // ---------------------------------------------------------------------------
 
-test.describe("TestFullPipeline", () => {
-  test("full crawl and search pipeline", async ({ request }) => {
-    const testUrl = "https://en.wikipedia.org/wiki/Linux";
-    const testDomain = "en.wikipedia.org";
-    const searchTerm = "Linux";
-
-    console.log(`\n1. Testing with URL: ${testUrl}`);
-
-    // Arrange: add domain to allowed list
-    console.log(`2. Adding domain '${testDomain}' to allowed list...`);
-    const addResp = await addAllowedDomain(request, testDomain);
-    expect(addResp.ok()).toBeTruthy();
-    const addResult = await addResp.json();
-    console.log(`   Done: ${addResult.message}`);
-
-    // Act: add URL to crawl queue
-    console.log("3. Adding URL to queue...");
-    const queueResp = await addToQueue(request, testUrl);
-    expect([200, 201]).toContain(queueResp.status());
-    console.log("   Done: URL queued");
-
-    // Assert: poll search until URL appears or timeout
-    console.log(
-      `4. Waiting for crawl and indexing (max ${TEST_TIMEOUT / 1000}s)...`,
-    );
-    let found = false;
-    const startTime = Date.now();
-
-    while (Date.now() - startTime < TEST_TIMEOUT) {
-      await sleep(2000);
-      let searchResp;
-      try {
-        searchResp = await search(request, searchTerm);
-      } catch (e) {
-        console.log(`   ... Search API error (retrying): ${e}`);
-        continue;
-      }
+// crawling-enabled is tenant-wide, and toggling it while the pipeline waits
+// for a crawl would stall that test. Keep both groups in one worker, in file
+// order, even though the rest of the suite runs fully parallel.
+test.describe("Crawler state", () => {
+  test.describe.configure({ mode: "default" });
 
-      if (searchResp.status() !== 200) {
-        continue;
-      }
+  // -------------------------------------------------------------------------
+  // GET / PUT /admin/settings/crawling-enabled
+  // -------------------------------------------------------------------------
 
-      const results = await searchResp.json();
-      if (!results.results?.length) {
-        console.log("   ... No results yet, waiting...");
-        continue;
-      }
+  test.describe("TestCrawlingSettings", () => {
+    test("get returns boolean", async ({ agent }) => {
+      const response = await agent.get("/admin/settings/crawling-enabled", {
+        timeout: REQUEST_TIMEOUT,
+      });
 
-      const urls = results.results.map(
-        (r: { document: { url?: string } }) => r.document?.url,
-      );
-      if (!urls.includes(testUrl)) {
-        console.log(
-          `   ... Found ${results.results.length} results, waiting for our URL...`,
-        );
-        continue;
+      expect(response.status()).toBe(200);
+      const data = await response.json();
+      expect(data).toHaveProperty("enabled");
+      expect(typeof data.enabled).toBe("boolean");
+    });
+
+    test("disable then enable persists", async ({ agent }) => {
+      const settingsUrl = "/admin/settings/crawling-enabled";
+      const originalResp = await agent.get(settingsUrl, {
+        timeout: REQUEST_TIMEOUT,
+      });
+      const original = (await originalResp.json()).enabled;
+
+      try {
+        // Disable
+        let r = await agent.put(settingsUrl, {
+          data: { enabled: false },
+          timeout: REQUEST_TIMEOUT,
+        });
+        expect(r.status()).toBe(200);
+        expect((await r.json()).enabled).toBe(false);
+        let check = await agent.get(settingsUrl, { timeout: REQUEST_TIMEOUT });
+        expect((await check.json()).enabled).toBe(false);
+
+        // Enable
+        r = await agent.put(settingsUrl, {
+          data: { enabled: true },
+          timeout: REQUEST_TIMEOUT,
+        });
+        expect(r.status()).toBe(200);
+        expect((await r.json()).enabled).toBe(true);
+        check = await agent.get(settingsUrl, { timeout: REQUEST_TIMEOUT });
+        expect((await check.json()).enabled).toBe(true);
+      } finally {
+        // Always restore the original value, even if an assertion failed or
+        // a PUT threw after the agent applied it, so the pipeline test that
+        // follows in this group is not left without a crawler. A failed
+        // restore is reported softly so it cannot mask an earlier failure.
+        let restoreStatus: number | string;
+        try {
+          const restore = await agent.put(settingsUrl, {
+            data: { enabled: original },
+            timeout: REQUEST_TIMEOUT,
+          });
+          restoreStatus = restore.status();
+        } catch (e) {
+          restoreStatus = `${e}`;
+        }
+        expect.soft(restoreStatus, "restore crawling-enabled").toBe(200);
       }
+    });
+  });
 
-      const elapsed = ((Date.now() - startTime) / 1000).toFixed(1);
-      console.log(`   Done: Page indexed and searchable (${elapsed}s)`);
-      found = true;
-      break;
-    }
+  // -------------------------------------------------------------------------
+  // Full pipeline: Queue URL → Crawl → Index → Search
+  // -------------------------------------------------------------------------
+
+  test.describe("TestFullPipeline", () => {
+    for (const pipelineCase of PIPELINE_CASES) {
+      test(`full crawl and search pipeline: ${pipelineCase.url}`, async ({
+        agent,
+      }) => {
+        const { url, domain, searchTerm } = pipelineCase;
+
+        // Progress is reported through test.step / annotations (visible in
+        // the list reporter and traces) rather than console output.
+        await test.step(`allow ${domain} and queue ${url}`, async () => {
+          const { added, queued } = await seedCrawl(agent, domain, url);
+          expect(added.ok()).toBeTruthy();
+          expect([200, 201]).toContain(queued.status());
+        });
+
+        const indexed = await test.step(
+          `wait for crawl and indexing (max ${TEST_TIMEOUT / 1000}s)`,
+          async () => {
+            const startTime = performance.now();
+            const result = await waitForUrlIndexed(agent, url, searchTerm, {
+              timeout: TEST_TIMEOUT,
+              initialInterval: PIPELINE_POLL_INITIAL_INTERVAL,
+              maxInterval: PIPELINE_POLL_MAX_INTERVAL,
+              backoffFactor: PIPELINE_POLL_BACKOFF_FACTOR,
+            });
+            const elapsed = (performance.now() - startTime) / 1000;
+            test.info().annotations.push({
+              type: "indexed-after",
+              description: `${elapsed.toFixed(1)}s`,
+            });
+            return result;
+          },
+        );
 
-    expect(found).toBeTruthy();
+        await test.step("verify search quality", async () => {
+          // The payload that contained the URL is the one to judge; a second
+          // search would cost a round trip and could see a different index.
+          const hits = indexed.results.results ?? [];
+          expect(hits.length).toBeGreaterThanOrEqual(1);
 
-    // Assert: verify search quality
-    console.log("5. Verifying search quality...");
-    const finalResp = await search(request, searchTerm);
-    expect(finalResp.status()).toBe(200);
-    const finalResults = await finalResp.json();
-    expect(finalResults.results.length).toBeGreaterThanOrEqual(1);
-
-    const topUrls = finalResults.results
-      .slice(0, 3)
-      .map((r: { document: { url: string } }) => r.document.url);
-    expect(topUrls).toContain(testUrl);
-
-    console.log(
-      `   Done: Found ${finalResults.results.length} results, our URL in top 3`,
-    );
-    console.log("\nE2E test passed!");
+          const topUrls = resultUrls({ results: hits.slice(0, 3) });
+          expect(topUrls).toContain(url);
+        });
+      });
+    }
   });
 });